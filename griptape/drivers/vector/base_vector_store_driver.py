@@ -1,6 +1,5 @@
 from abc import ABC, abstractmethod
 from concurrent import futures
-from dataclasses import dataclass
 from typing import Optional
 from attr import define, field, Factory
 from griptape import utils
@@ -12,14 +11,14 @@ from griptape.drivers import BaseEmbeddingDriver, OpenAiEmbeddingDriver
 class BaseVectorStoreDriver(ABC):
     DEFAULT_QUERY_COUNT = 5
 
-    @dataclass
+    @define
     class QueryResult:
         vector: list[float]
         score: float
         meta: Optional[dict] = None
         namespace: Optional[str] = None
 
-    @dataclass
+    @define
     class Entry:
         id: str
         vector: list[float]
@@ -41,11 +40,10 @@ class BaseVectorStoreDriver(ABC):
             meta: Optional[dict] = None,
             **kwargs
     ) -> None:
-        utils.execute_futures_dict({
-            namespace:
-                self.futures_executor.submit(self.upsert_text_artifact, a, namespace, meta, **kwargs)
+        utils.execute_futures_list([
+            self.futures_executor.submit(self.upsert_text_artifact, a, namespace, meta, **kwargs)
             for namespace, artifact_list in artifacts.items() for a in artifact_list
-        })
+        ])
 
     def upsert_text_artifact(
             self,
@@ -54,8 +52,7 @@ class BaseVectorStoreDriver(ABC):
             meta: Optional[dict] = None,
             **kwargs
     ) -> str:
-        if not meta:
-            meta = {}
+        meta = {} if meta is None else dict(meta)
 
         meta["artifact"] = artifact.to_json()
 
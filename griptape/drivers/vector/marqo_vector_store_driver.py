@@ -1,13 +1,27 @@
-from typing import Optional, List, Dict, Any
+import copy
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from itertools import islice
+from typing import Optional, List, Dict, Any, Iterator
+from griptape import utils
 from griptape.drivers import BaseVectorStoreDriver
 from griptape.artifacts import TextArtifact
 import marqo
+from marqo.errors import MarqoWebError
 from attr import define, field, Factory
 import logging
 
 
 @define
 class MarqoVectorStoreDriver(BaseVectorStoreDriver):
+    ENTRY_EXCLUDED_KEYS = frozenset(("_id", "_tensor_facets", "_found"))
+    QUERY_EXCLUDED_KEYS = frozenset(("_score",))
+    ALL_ATTRIBUTES = ("*",)
+    ID_ATTRIBUTES = ("_id",)
+
     api_key: str = field(kw_only=True)
     url: str = field(kw_only=True)
     mq: marqo.Client = field(
@@ -15,11 +29,37 @@ class MarqoVectorStoreDriver(BaseVectorStoreDriver):
             lambda self: marqo.Client(self.url, self.api_key), takes_self=True
         ),
         kw_only=True,
+        on_setattr=lambda self, _, mq: self._on_mq_set(mq)
     )
-    index: str = field(kw_only=True)
+    index: str = field(kw_only=True, on_setattr=lambda self, _, index: self._on_index_set(index))
+    batch_size: int = field(default=100, kw_only=True)
+    max_retrievable_docs: int = field(default=10000, kw_only=True)
+    # Off by default: only writes made through this driver invalidate it, so it's safe only when this driver is the
+    # index's sole writer. Writes from other drivers, processes, or the Marqo console stay invisible until entries expire.
+    query_cache_size: int = field(default=0, kw_only=True)
+    query_cache_ttl: float = field(default=60, kw_only=True)
+    _query_cache: OrderedDict = field(factory=OrderedDict, init=False)
+    _query_cache_lock: threading.Lock = field(factory=threading.Lock, init=False)
+    _query_cache_generation: int = field(default=0, init=False)
+    # Opt-in sqlite file that skips re-sending documents already upserted within `upsert_cache_ttl` seconds. Only
+    # deletes made through this driver's `delete_index` clear it: documents removed any other way (`mq.delete_documents`,
+    # another driver, an index dropped through the client or console) are not re-sent until their entries expire.
+    # Call `close()` when done with the driver to release the sqlite connection.
+    upsert_cache_path: Optional[str] = field(default=None, kw_only=True)
+    upsert_cache_ttl: float = field(default=24 * 60 * 60, kw_only=True)
+    _index_client: marqo.index.Index = field(init=False)
+    _upsert_cache: Optional[sqlite3.Connection] = field(default=None, init=False)
+    _upsert_cache_lock: threading.Lock = field(factory=threading.Lock, init=False)
 
     def __attrs_post_init__(self):
         """Initialize the Marqo client with the given API key and URL."""
+        if self.upsert_cache_path:
+            self._upsert_cache = sqlite3.connect(self.upsert_cache_path, check_same_thread=False)
+            self._upsert_cache.execute(
+                "CREATE TABLE IF NOT EXISTS upsert (hash TEXT PRIMARY KEY, index_name TEXT, doc_id TEXT, ts REAL)"
+            )
+            self._upsert_cache.commit()
+
         self.set_index(self.index)
 
     def set_index(self, index):
@@ -28,11 +68,20 @@ class MarqoVectorStoreDriver(BaseVectorStoreDriver):
         Args:
             index (str): The index to set for the Marqo client.
         """
-        indexes = self.get_indexes()
-
-        if index not in indexes:
-            self.create_index(index)
-            logging.info(f"Created index '{index}'")
+        # A single stats call confirms the index exists without listing every index on the server.
+        try:
+            self.mq.index(index).get_stats()
+        except MarqoWebError as e:
+            if e.code != "index_not_found":
+                raise
+
+            try:
+                self.create_index(index)
+                logging.info(f"Created index '{index}'")
+            except MarqoWebError as e:
+                # Another client created it in the meantime.
+                if e.code != "index_already_exists":
+                    raise
 
         self.index = index
 
@@ -56,19 +105,9 @@ class MarqoVectorStoreDriver(BaseVectorStoreDriver):
             str: The ID of the document that was added.
         """
 
-        doc = {
-            "_id": vector_id,
-            "Description": string,  # Description will be treated as tensor field
-        }
+        doc = self._text_document(string, vector_id, namespace, meta)
 
-        # Non-tensor fields
-        if meta:
-            doc["meta"] = str(meta)
-        if namespace:
-            doc['namespace'] = namespace
-
-        response = self.mq.index(self.index).add_documents([doc], non_tensor_fields=["meta", "namespace"])
-        return response["items"][0]["_id"]
+        return self._add_documents([doc])[0]
 
     def upsert_text_artifact(
             self,
@@ -88,17 +127,64 @@ class MarqoVectorStoreDriver(BaseVectorStoreDriver):
             str: The ID of the artifact that was added.
         """
 
-        artifact_json = artifact.to_json()
+        doc = self._artifact_document(artifact, namespace)
 
-        doc = {
-            "_id": artifact.id,
-            "Description": artifact.value,  # Description will be treated as tensor field
-            "artifact": str(artifact_json),
-            "namespace": namespace
-        }
+        return self._add_documents([doc])[0]
+
+    def upsert_texts(
+            self,
+            strings: list[str],
+            namespace: Optional[str] = None,
+            meta: Optional[dict] = None,
+            **kwargs
+    ) -> list[str]:
+        """Upsert multiple text documents into the Marqo index in batches.
+
+        Args:
+            strings (list[str]): The strings to be indexed.
+            namespace (Optional[str], optional): An optional namespace for the documents.
+            meta (Optional[dict], optional): An optional dictionary of metadata for the documents.
+
+        Returns:
+            list[str]: The IDs of the documents that were added, in input order.
+        """
+
+        return self._add_documents([self._text_document(s, None, namespace, meta) for s in strings])
+
+    def upsert_text_artifacts_batch(
+            self,
+            artifacts: list[TextArtifact],
+            namespace: Optional[str] = None,
+            **kwargs
+    ) -> list[str]:
+        """Upsert multiple text artifacts into the Marqo index in batches.
+
+        Args:
+            artifacts (list[TextArtifact]): The text artifacts to be indexed.
+            namespace (Optional[str], optional): An optional namespace for the artifacts.
 
-        response = self.mq.index(self.index).add_documents([doc], non_tensor_fields=["meta", "namespace", "artifact"])
-        return response["items"][0]["_id"]
+        Returns:
+            list[str]: The IDs of the artifacts that were added, in input order.
+        """
+
+        return self._add_documents([self._artifact_document(a, namespace) for a in artifacts])
+
+    def upsert_text_artifacts(
+            self,
+            artifacts: dict[str, list[TextArtifact]],
+            meta: Optional[dict] = None,
+            **kwargs
+    ) -> None:
+        """Upsert text artifacts into the Marqo index, sending `batch_size` artifacts per request concurrently.
+
+        Args:
+            artifacts (dict[str, list[TextArtifact]]): Text artifacts keyed by namespace.
+            meta (Optional[dict], optional): Ignored, kept for compatibility with the base driver.
+        """
+
+        self._add_documents([
+            self._artifact_document(a, namespace) for namespace, artifact_list in artifacts.items() for a in artifact_list
+        ])
 
     def load_entry(self, vector_id: str, namespace: Optional[str] = None) -> Optional[BaseVectorStoreDriver.Entry]:
         """Load a document entry from the Marqo index.
@@ -110,19 +196,19 @@ class MarqoVectorStoreDriver(BaseVectorStoreDriver):
         Returns:
             Optional[BaseVectorStoreDriver.Entry]: The loaded Entry if found, otherwise None.
         """
-        result = self.mq.index(self.index).get_document(document_id=vector_id, expose_facets=True)
+        result = self._index_client.get_document(document_id=vector_id, expose_facets=True)
 
         if result and "_tensor_facets" in result and len(result["_tensor_facets"]) > 0:
             return BaseVectorStoreDriver.Entry(
                 id=result["_id"],
-                meta={k: v for k, v in result.items() if k not in ["_id"]},
+                meta={k: v for k, v in result.items() if k not in self.ENTRY_EXCLUDED_KEYS},
                 vector=result["_tensor_facets"][0]["_embedding"],
             )
         else:
             return None
 
     def load_entries(self, namespace: Optional[str] = None) -> list[BaseVectorStoreDriver.Entry]:
-        """Load all document entries from the Marqo index.
+        """Load all document entries from the Marqo index, up to `max_retrievable_docs`.
 
         Args:
             namespace (Optional[str], optional): The namespace to filter entries by.
@@ -131,29 +217,64 @@ class MarqoVectorStoreDriver(BaseVectorStoreDriver):
             list[BaseVectorStoreDriver.Entry]: The list of loaded Entries.
         """
 
+        return list(self.iter_entries(namespace))
+
+    def iter_entries(
+            self,
+            namespace: Optional[str] = None,
+            page_size: int = 500
+    ) -> Iterator[BaseVectorStoreDriver.Entry]:
+        """Lazily load document entries from the Marqo index, one page of search results at a time.
+
+        Marqo caps `offset + limit` at its maximum number of retrievable documents, so iteration stops with a warning
+        once `max_retrievable_docs` entries have been paged through. Empty-query search results have no guaranteed
+        order; duplicate IDs across pages are skipped, but documents may be missed if the index changes mid-iteration.
+
+        Args:
+            namespace (Optional[str], optional): The namespace to filter entries by.
+            page_size (int, optional): The number of documents fetched per request.
+
+        Returns:
+            Iterator[BaseVectorStoreDriver.Entry]: An iterator over the loaded Entries.
+        """
+
         filter_string = f"namespace:{namespace}" if namespace else None
-        results = self.mq.index(self.index).search("", limit=10000, filter_string=filter_string)
-
-        # get all _id's from search results
-        ids = [r["_id"] for r in results["hits"]]
-
-        # get documents corresponding to the ids
-        documents = self.mq.index(self.index).get_documents(document_ids=ids, expose_facets=True)
-
-        # for each document, if it's found, create an Entry object
-        entries = []
-        for doc in documents['results']:
-            if doc['_found']:
-                entries.append(
-                    BaseVectorStoreDriver.Entry(
-                        id=doc["_id"],
-                        vector=doc["_tensor_facets"][0]["_embedding"],
-                        meta={k: v for k, v in doc.items() if k not in ["_id", "_tensor_facets", "_found"]},
-                        namespace=doc.get("namespace"),
-                    )
-                )
+        seen_ids = set()
+        offset = 0
+
+        while offset < self.max_retrievable_docs:
+            limit = min(page_size, self.max_retrievable_docs - offset)
+            results = self._index_client.search(
+                "", limit=limit, offset=offset, filter_string=filter_string, attributes_to_retrieve=self.ID_ATTRIBUTES
+            )
 
-        return entries
+            # get all _id's from this page of search results that weren't returned by an earlier page
+            ids = [r["_id"] for r in results["hits"] if r["_id"] not in seen_ids]
+            seen_ids.update(ids)
+
+            if ids:
+                # get documents corresponding to the ids
+                documents = self._index_client.get_documents(document_ids=ids, expose_facets=True)
+
+                # for each document, if it's found, yield an Entry object
+                for doc in documents["results"]:
+                    if doc["_found"]:
+                        yield BaseVectorStoreDriver.Entry(
+                            id=doc["_id"],
+                            vector=doc["_tensor_facets"][0]["_embedding"],
+                            meta={k: v for k, v in doc.items() if k not in self.ENTRY_EXCLUDED_KEYS},
+                            namespace=doc.get("namespace"),
+                        )
+
+            if len(results["hits"]) < limit:
+                return
+
+            offset += limit
+
+        logging.warning(
+            f"Stopped loading entries from index '{self.index}' after {self.max_retrievable_docs} documents, "
+            f"Marqo's maximum number of retrievable documents"
+        )
 
     def query(
             self,
@@ -177,26 +298,49 @@ class MarqoVectorStoreDriver(BaseVectorStoreDriver):
             list[BaseVectorStoreDriver.QueryResult]: The list of query results.
         """
 
+        # Marqo rejects non-positive search limits, so an explicit zero count never reaches the server.
+        if count == 0:
+            return []
+
+        cache_key = (query, count, namespace, include_vectors, include_metadata, repr(sorted(kwargs.items())))
+        cache_generation = self._query_cache_generation
+        cached_results = self._load_cached_query(cache_key)
+
+        if cached_results is not None:
+            return cached_results
+
         params = {
-                     "limit": count if count else BaseVectorStoreDriver.DEFAULT_QUERY_COUNT,
-                     "attributes_to_retrieve": ["*"] if include_metadata else ["_id"],
-                     "filter_string": f"namespace:{namespace}" if namespace else None
-                 } | kwargs
+            "limit": count if count is not None else BaseVectorStoreDriver.DEFAULT_QUERY_COUNT,
+            "attributes_to_retrieve": self.ALL_ATTRIBUTES if include_metadata else self.ID_ATTRIBUTES,
+            "filter_string": f"namespace:{namespace}" if namespace else None
+        }
+        params.update(kwargs)
+
+        results = self._index_client.search(query, **params)
 
-        results = self.mq.index(self.index).search(query, **params)
+        ids = [r["_id"] for r in results["hits"]] if include_vectors else []
 
-        if include_vectors:
-            results["hits"] = list(map(lambda r: self.mq.index(self.index).get_document(r["_id"]), results["hits"]))
+        if ids:
+            documents = self._index_client.get_documents(document_ids=ids, expose_facets=True)
+            vectors = {
+                doc["_id"]: doc["_tensor_facets"][0]["_embedding"] for doc in documents["results"] if doc["_found"]
+            }
+        else:
+            vectors = {}
 
-        return [
+        query_results = [
             BaseVectorStoreDriver.QueryResult(
-                vector=[],
+                vector=vectors.get(r["_id"], []),
                 score=r["_score"],
-                meta={k: v for k, v in r.items() if k not in ["_score"]},
+                meta={k: v for k, v in r.items() if k not in self.QUERY_EXCLUDED_KEYS},
             )
             for r in results["hits"]
         ]
 
+        self._store_cached_query(cache_key, query_results, cache_generation)
+
+        return query_results
+
     def create_index(self, name: str, **kwargs) -> Dict[str, Any]:
         """Create a new index in the Marqo client.
 
@@ -213,7 +357,16 @@ class MarqoVectorStoreDriver(BaseVectorStoreDriver):
             name (str): The name of the index to delete.
         """
 
-        return self.mq.delete_index(name)
+        response = self.mq.delete_index(name)
+
+        self.invalidate_cache()
+
+        if self._upsert_cache is not None:
+            with self._upsert_cache_lock:
+                self._upsert_cache.execute("DELETE FROM upsert WHERE index_name = ?", (self._upsert_cache_scope(name),))
+                self._upsert_cache.commit()
+
+        return response
 
     def get_indexes(self) -> List[str]:
         """Get a list of all indexes in the Marqo client.
@@ -225,6 +378,181 @@ class MarqoVectorStoreDriver(BaseVectorStoreDriver):
         # Change this once API issue is fixed (entries in results are no longer objects but dicts)
         return [index.index_name for index in self.mq.get_indexes()["results"]]
 
+    def close(self) -> None:
+        """Close the upsert cache's sqlite connection, if one is open."""
+
+        if self._upsert_cache is not None:
+            with self._upsert_cache_lock:
+                self._upsert_cache.close()
+                self._upsert_cache = None
+
+    def invalidate_cache(self) -> None:
+        """Drop all cached query results."""
+
+        with self._query_cache_lock:
+            self._query_cache.clear()
+            self._query_cache_generation += 1
+
+    def _load_cached_query(self, key: tuple) -> Optional[list[BaseVectorStoreDriver.QueryResult]]:
+        with self._query_cache_lock:
+            cached = self._query_cache.get(key)
+
+            if cached is None:
+                return None
+
+            expires_at, query_results = cached
+
+            if time.monotonic() >= expires_at:
+                del self._query_cache[key]
+
+                return None
+
+            self._query_cache.move_to_end(key)
+
+        # Results are copied so callers can't mutate each other's results or the cached ones.
+        return copy.deepcopy(query_results)
+
+    def _store_cached_query(
+            self,
+            key: tuple,
+            query_results: list[BaseVectorStoreDriver.QueryResult],
+            generation: int
+    ) -> None:
+        if self.query_cache_size <= 0:
+            return
+
+        with self._query_cache_lock:
+            # The cache was invalidated while the search was in flight, so these results may be stale.
+            if generation != self._query_cache_generation:
+                return
+
+            self._query_cache[key] = (time.monotonic() + self.query_cache_ttl, copy.deepcopy(query_results))
+            self._query_cache.move_to_end(key)
+
+            while len(self._query_cache) > self.query_cache_size:
+                self._query_cache.popitem(last=False)
+
+    # These run whenever `mq` or `index` is assigned, so the cached Index object always follows them.
+    def _on_mq_set(self, mq: marqo.Client) -> marqo.Client:
+        self._bind_index_client(mq, self.index)
+
+        return mq
+
+    def _on_index_set(self, index: str) -> str:
+        self._bind_index_client(self.mq, index)
+
+        return index
+
+    def _bind_index_client(self, mq: marqo.Client, index: str) -> None:
+        self._index_client = mq.index(index)
+
+        self.invalidate_cache()
+
+    def _upsert_cache_scope(self, index: str) -> str:
+        # Cache files can be shared between Marqo servers, so rows are scoped to the server as well as the index.
+        return f"{self.url}/{index}"
+
+    def _document_hash(self, doc: dict) -> str:
+        return utils.str_to_hash(self._upsert_cache_scope(self.index) + json.dumps(doc, sort_keys=True))
+
+    def _load_cached_upsert(self, doc_hash: str) -> Optional[str]:
+        with self._upsert_cache_lock:
+            row = self._upsert_cache.execute(
+                "SELECT doc_id FROM upsert WHERE hash = ? AND ts > ?",
+                (doc_hash, time.time() - self.upsert_cache_ttl)
+            ).fetchone()
+
+        return row[0] if row else None
+
+    def _store_cached_upserts(self, hashes_and_ids: list[tuple[str, str]]) -> None:
+        scope = self._upsert_cache_scope(self.index)
+        now = time.time()
+
+        with self._upsert_cache_lock:
+            for doc_hash, doc_id in hashes_and_ids:
+                # The ID now holds this document, so any cached content previously written under it is stale.
+                self._upsert_cache.execute(
+                    "DELETE FROM upsert WHERE index_name = ? AND doc_id = ?", (scope, doc_id)
+                )
+                self._upsert_cache.execute(
+                    "INSERT OR REPLACE INTO upsert (hash, index_name, doc_id, ts) VALUES (?, ?, ?, ?)",
+                    (doc_hash, scope, doc_id, now)
+                )
+
+            self._upsert_cache.commit()
+
+    def _text_document(
+            self,
+            string: str,
+            vector_id: Optional[str],
+            namespace: Optional[str],
+            meta: Optional[dict]
+    ) -> dict:
+        doc = {
+            "_id": vector_id,
+            "Description": string,  # Description will be treated as tensor field
+        }
+
+        # Non-tensor fields
+        if meta:
+            doc["meta"] = str(meta)
+        if namespace:
+            doc["namespace"] = namespace
+
+        return doc
+
+    def _artifact_document(self, artifact: TextArtifact, namespace: Optional[str]) -> dict:
+        return {
+            "_id": artifact.id,
+            "Description": artifact.value,  # Description will be treated as tensor field
+            "artifact": artifact.to_json(),
+            "namespace": namespace
+        }
+
+    def _add_documents(self, docs: list[dict]) -> list[str]:
+        ids = [None] * len(docs)
+        hashes = {}
+        pending = []
+
+        for i, doc in enumerate(docs):
+            if self._upsert_cache is not None:
+                hashes[i] = self._document_hash(doc)
+                ids[i] = self._load_cached_upsert(hashes[i])
+
+            if ids[i] is None:
+                pending.append(i)
+
+        batches = []
+        it = iter(pending)
+
+        while batch := list(islice(it, self.batch_size)):
+            batches.append([docs[i] for i in batch])
+
+        try:
+            if len(batches) <= 1:
+                responses = [self._add_batch(b) for b in batches]
+            else:
+                # Batches are independent HTTP requests, so they're sent concurrently; map() keeps responses in order.
+                responses = self.futures_executor.map(self._add_batch, batches)
+
+            items = [item for response in responses for item in response["items"]]
+        finally:
+            # Other batches may have landed even if one failed, so cached queries can't be trusted either way.
+            self.invalidate_cache()
+
+        for i, item in zip(pending, items):
+            ids[i] = item["_id"]
+
+        if self._upsert_cache is not None:
+            self._store_cached_upserts([
+                (hashes[i], item["_id"]) for i, item in zip(pending, items) if item.get("status", 200) < 300
+            ])
+
+        return ids
+
+    def _add_batch(self, batch: list[dict]) -> dict:
+        return self._index_client.add_documents(batch, non_tensor_fields=["meta", "namespace", "artifact"])
+
     def upsert_vector(
             self,
             vector: list[float],
@@ -1,3 +1,6 @@
+import threading
+from collections import OrderedDict
+from typing import Callable
 import cohere
 from attr import define, field
 from griptape.tokenizers import BaseTokenizer
@@ -7,16 +10,38 @@ from griptape.tokenizers import BaseTokenizer
 class CohereTokenizer(BaseTokenizer):
     DEFAULT_MODEL = "command"
     MAX_TOKENS = 2048
+    CACHE_SIZE = 4096
 
     model: str = field(default=DEFAULT_MODEL, kw_only=True)
     client: cohere.Client = field(kw_only=True)
+    # Both calls are API round-trips and the same prompts are tokenized repeatedly, so results are memoized.
+    _encode_cache: OrderedDict = field(factory=OrderedDict, init=False, eq=False, repr=False)
+    _decode_cache: OrderedDict = field(factory=OrderedDict, init=False, eq=False, repr=False)
+    _cache_lock: threading.Lock = field(factory=threading.Lock, init=False, eq=False, repr=False)
 
     @property
     def max_tokens(self) -> int:
         return self.MAX_TOKENS
 
     def encode(self, text: str) -> list[int]:
-        return self.client.tokenize(text=text).tokens
+        return list(self._cached(self._encode_cache, text, lambda: tuple(self.client.tokenize(text=text).tokens)))
 
     def decode(self, tokens: list[int]) -> str:
-        return self.client.detokenize(tokens=tokens).text
+        return self._cached(self._decode_cache, tuple(tokens), lambda: self.client.detokenize(tokens=tokens).text)
+
+    def _cached(self, cache: OrderedDict, key, fn: Callable):
+        with self._cache_lock:
+            if key in cache:
+                cache.move_to_end(key)
+
+                return cache[key]
+
+        value = fn()
+
+        with self._cache_lock:
+            cache[key] = value
+
+            if len(cache) > self.CACHE_SIZE:
+                cache.popitem(last=False)
+
+        return value
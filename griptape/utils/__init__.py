@@ -7,7 +7,7 @@ from .manifest_validator import ManifestValidator
 from .python_runner import PythonRunner
 from .command_runner import CommandRunner
 from .chat import Chat
-from .futures import execute_futures_dict
+from .futures import execute_futures_dict, execute_futures_list
 from .token_counter import TokenCounter
 
 
@@ -25,5 +25,6 @@ __all__ = [
     "Chat",
     "str_to_hash",
     "execute_futures_dict",
+    "execute_futures_list",
     "TokenCounter"
 ]
@@ -11,13 +11,7 @@ class Conversation:
     memory: ConversationMemory = field()
 
     def lines(self) -> list[str]:
-        lines = []
-
-        for run in self.memory.runs:
-            lines.append(f"Q: {run.input}")
-            lines.append(f"A: {run.output}")
-
-        return lines
+        return [line for run in self.memory.runs for line in (f"Q: {run.input}", f"A: {run.output}")]
 
     def __str__(self) -> str:
-        return str.join("\n", self.lines())
+        return "\n".join(self.lines())
@@ -2,8 +2,9 @@ import pytest
 from griptape.artifacts import TextArtifact
 from griptape.drivers import MarqoVectorStoreDriver
 from tests.mocks.mock_embedding_driver import MockEmbeddingDriver
-from griptape.artifacts import TextArtifact
+from griptape.artifacts import TextArtifact, BaseArtifact
 from collections import namedtuple
+from marqo.errors import MarqoWebError
 
 
 class TestMarqoVectorStorageDriver:
@@ -110,6 +111,12 @@ class TestMarqoVectorStorageDriver:
             mq=mock_marqo
         )
 
+    @pytest.fixture
+    def cached_driver(self, driver):
+        driver.query_cache_size = 1024
+
+        return driver
+
     def test_create_index(self, driver, mock_marqo):
         mock_marqo.create_index.reset_mock()
         result = driver.create_index("my-first-index")
@@ -117,11 +124,73 @@ class TestMarqoVectorStorageDriver:
         assert result["acknowledged"] == True
         assert result["index"] == "my-first-index"
 
+    def test_set_index(self, driver, mock_marqo):
+        driver.set_index("my-first-index")
+        mock_marqo.index.reset_mock()
+
+        driver.upsert_text("test text")
+        driver.query("Test query")
+
+        mock_marqo.index.assert_not_called()
+        assert driver.index == "my-first-index"
+
+    def test_assign_index(self, driver, mock_marqo, mocker):
+        other_index = mocker.Mock()
+        other_index.search.return_value = {"hits": []}
+        mock_marqo.index.side_effect = lambda name: other_index if name == "other" else mocker.DEFAULT
+
+        driver.index = "other"
+        driver.query("Test query")
+
+        other_index.search.assert_called_once()
+
+    def test_assign_mq(self, driver, mocker):
+        other_mq = mocker.Mock()
+        other_mq.index.return_value.search.return_value = {"hits": []}
+
+        driver.mq = other_mq
+        driver.query("Test query")
+
+        other_mq.index.assert_called_once_with("test")
+        other_mq.index().search.assert_called_once()
+
+    def test_set_index_creates_missing_index(self, driver, mock_marqo):
+        mock_marqo.index().get_stats.side_effect = MarqoWebError("not found", code="index_not_found")
+        mock_marqo.create_index.reset_mock()
+
+        driver.set_index("new-index")
+
+        mock_marqo.create_index.assert_called_once_with("new-index", settings_dict={})
+        mock_marqo.get_indexes.assert_not_called()
+
+    def test_set_index_existing_index(self, driver, mock_marqo):
+        mock_marqo.create_index.reset_mock()
+
+        driver.set_index("my-first-index")
+
+        mock_marqo.create_index.assert_not_called()
+
+    def test_set_index_created_concurrently(self, driver, mock_marqo):
+        mock_marqo.index().get_stats.side_effect = MarqoWebError("not found", code="index_not_found")
+        mock_marqo.create_index.side_effect = MarqoWebError("exists", code="index_already_exists")
+
+        driver.set_index("new-index")
+
+        assert driver.index == "new-index"
+
     def test_upsert_text(self, driver, mock_marqo):
         result = driver.upsert_text("test text", vector_id="5aed93eb-3878-4f12-bc92-0fda01c7d23d")
         mock_marqo.index().add_documents.assert_called()
         assert result == "5aed93eb-3878-4f12-bc92-0fda01c7d23d"
 
+    def test_upsert_text_single_batch_runs_inline(self, driver, mock_marqo, mocker):
+        driver.futures_executor = mocker.Mock()
+
+        driver.upsert_text("test text")
+
+        driver.futures_executor.map.assert_not_called()
+        mock_marqo.index().add_documents.assert_called_once()
+
     def test_upsert_text_artifact(self, driver, mock_marqo):
         # Arrange
         text = TextArtifact(id="a44b04ff052e4109b3c6fda0f3f3e997", value="racoons")
@@ -157,7 +226,86 @@ class TestMarqoVectorStorageDriver:
         print(result, type(result))
         assert result == expected_return_value["items"][0]["_id"]
 
+        doc = mock_marqo.index().add_documents.call_args.args[0][0]
+
+        assert BaseArtifact.from_json(doc["artifact"]).value == "racoons"
+
+    def test_upsert_cache(self, mock_marqo, tmp_path):
+        cache_path = str(tmp_path / "upserts.db")
+        mock_marqo.index().add_documents.side_effect = lambda docs, **kwargs: {
+            "errors": False,
+            "items": [{"_id": f"id-{d['Description']}", "result": "created", "status": 201} for d in docs]
+        }
+
+        driver = MarqoVectorStoreDriver(
+            api_key="foobar", url="http://localhost:8000", index="test", mq=mock_marqo, upsert_cache_path=cache_path
+        )
+
+        assert driver.upsert_texts(["foo", "bar"]) == ["id-foo", "id-bar"]
+        assert mock_marqo.index().add_documents.call_count == 1
+
+        # a new driver on the same cache file skips documents that were already upserted
+        driver = MarqoVectorStoreDriver(
+            api_key="foobar", url="http://localhost:8000", index="test", mq=mock_marqo, upsert_cache_path=cache_path
+        )
+
+        assert driver.upsert_texts(["foo", "baz"]) == ["id-foo", "id-baz"]
+        assert mock_marqo.index().add_documents.call_args.args[0] == [{"_id": None, "Description": "baz"}]
+
+        driver.delete_index("test")
+        driver.upsert_text("foo")
 
+        assert mock_marqo.index().add_documents.call_args.args[0] == [{"_id": None, "Description": "foo"}]
+
+    def test_close_upsert_cache(self, mock_marqo, tmp_path):
+        driver = MarqoVectorStoreDriver(
+            api_key="foobar",
+            url="http://localhost:8000",
+            index="test",
+            mq=mock_marqo,
+            upsert_cache_path=str(tmp_path / "upserts.db")
+        )
+
+        driver.close()
+        driver.close()
+        driver.upsert_text("foo")
+
+        mock_marqo.index().add_documents.assert_called_once()
+
+    def test_upsert_cache_overwritten_id(self, mock_marqo, tmp_path):
+        mock_marqo.index().add_documents.side_effect = lambda docs, **kwargs: {
+            "errors": False,
+            "items": [{"_id": d["_id"], "result": "created", "status": 201} for d in docs]
+        }
+        driver = MarqoVectorStoreDriver(
+            api_key="foobar",
+            url="http://localhost:8000",
+            index="test",
+            mq=mock_marqo,
+            upsert_cache_path=str(tmp_path / "upserts.db")
+        )
+
+        driver.upsert_text("foo", vector_id="X")
+        driver.upsert_text("bar", vector_id="X")
+        driver.upsert_text("foo", vector_id="X")
+
+        assert [c.args[0][0]["Description"] for c in mock_marqo.index().add_documents.call_args_list] == [
+            "foo", "bar", "foo"
+        ]
+
+    def test_upsert_cache_scoped_to_url(self, mock_marqo, tmp_path):
+        cache_path = str(tmp_path / "upserts.db")
+        mock_marqo.index().add_documents.side_effect = lambda docs, **kwargs: {
+            "errors": False,
+            "items": [{"_id": f"id-{d['Description']}", "result": "created", "status": 201} for d in docs]
+        }
+
+        for url in ["http://localhost:8000", "http://localhost:9000"]:
+            MarqoVectorStoreDriver(
+                api_key="foobar", url=url, index="test", mq=mock_marqo, upsert_cache_path=cache_path
+            ).upsert_text("foo")
+
+        assert mock_marqo.index().add_documents.call_count == 2
 
     def test_search(self, driver, mock_marqo):
         results = driver.query("Test query")
@@ -168,6 +316,125 @@ class TestMarqoVectorStorageDriver:
         assert results[0].meta["Title"] == "Test Title"
         assert results[0].meta["Description"] == "Test description"
 
+    def test_search_params(self, driver, mock_marqo):
+        driver.query("Test query", count=3, namespace="foo", include_metadata=False, searchable_attributes=["Title"])
+        driver.query("Test query", namespace="foo", filter_string="namespace:bar")
+
+        assert mock_marqo.index().search.call_args_list[0].kwargs == {
+            "limit": 3,
+            "attributes_to_retrieve": ("_id",),
+            "filter_string": "namespace:foo",
+            "searchable_attributes": ["Title"]
+        }
+        assert mock_marqo.index().search.call_args_list[1].kwargs["filter_string"] == "namespace:bar"
+
+    def test_search_zero_count(self, driver, mock_marqo):
+        assert driver.query("Test query", count=0) == []
+        mock_marqo.index().search.assert_not_called()
+
+    def test_search_with_vectors(self, driver, mock_marqo):
+        mock_marqo.index().get_documents.return_value = {
+            "results": [
+                {
+                    "_found": True,
+                    "_id": "5aed93eb-3878-4f12-bc92-0fda01c7d23d",
+                    "_tensor_facets": [{"_embedding": [0.1, 0.2, 0.3]}],
+                }
+            ]
+        }
+
+        results = driver.query("Test query", include_vectors=True)
+
+        mock_marqo.index().get_documents.assert_called_once_with(
+            document_ids=["5aed93eb-3878-4f12-bc92-0fda01c7d23d"], expose_facets=True
+        )
+        mock_marqo.index().get_document.assert_not_called()
+        assert len(results) == 1
+        assert results[0].score == 0.6047464
+        assert results[0].vector == [0.1, 0.2, 0.3]
+
+    def test_search_with_vectors_no_hits(self, driver, mock_marqo):
+        mock_marqo.index().search.return_value = {"hits": []}
+
+        results = driver.query("Test query", include_vectors=True)
+
+        assert results == []
+        mock_marqo.index().get_documents.assert_not_called()
+
+    def test_search_cache_disabled_by_default(self, driver, mock_marqo):
+        driver.query("Test query")
+        driver.query("Test query")
+
+        assert mock_marqo.index().search.call_count == 2
+
+    def test_search_cache(self, cached_driver, mock_marqo):
+        mock_marqo.index().search.reset_mock()
+
+        first = cached_driver.query("Test query")
+        second = cached_driver.query("Test query")
+
+        assert first == second
+        mock_marqo.index().search.assert_called_once()
+
+        cached_driver.query("Test query", namespace="foo")
+
+        assert mock_marqo.index().search.call_count == 2
+
+        cached_driver.upsert_text("test text")
+        cached_driver.query("Test query")
+
+        assert mock_marqo.index().search.call_count == 3
+
+    def test_search_cache_invalidated_during_search(self, cached_driver, mock_marqo):
+        search_response = mock_marqo.index().search.return_value
+
+        def search(*args, **kwargs):
+            # simulates an upsert finishing while the search is in flight
+            cached_driver.invalidate_cache()
+
+            return search_response
+
+        mock_marqo.index().search.side_effect = search
+
+        cached_driver.query("Test query")
+        cached_driver.query("Test query")
+
+        assert mock_marqo.index().search.call_count == 2
+
+    def test_search_cache_returns_copies(self, cached_driver, mock_marqo):
+        cached_driver.query("Test query")[0].meta["Title"] = "changed"
+
+        assert cached_driver.query("Test query")[0].meta["Title"] == "Test Title"
+        mock_marqo.index().search.assert_called_once()
+
+    def test_search_cache_invalidated_on_failed_upsert(self, cached_driver, mock_marqo):
+        def add_documents(docs, **kwargs):
+            if docs[0]["Description"] == "bar":
+                raise Exception("batch failed")
+
+            return {"errors": False, "items": [{"_id": "foo", "result": "created", "status": 201}]}
+
+        mock_marqo.index().add_documents.side_effect = add_documents
+        cached_driver.batch_size = 1
+
+        cached_driver.query("Test query")
+
+        with pytest.raises(Exception):
+            cached_driver.upsert_texts(["foo", "bar"])
+
+        cached_driver.query("Test query")
+
+        assert mock_marqo.index().search.call_count == 2
+
+    def test_search_cache_ttl(self, cached_driver, mock_marqo):
+        mock_marqo.index().search.reset_mock()
+        cached_driver.query_cache_ttl = 0
+
+        cached_driver.query("Test query")
+        cached_driver.query("Test query")
+
+        assert mock_marqo.index().search.call_count == 2
+
 
     def test_laod_entry(self, driver, mock_marqo):
         # Mock 'get_document' method to return a dictionary
@@ -176,6 +443,7 @@ class TestMarqoVectorStorageDriver:
         assert entry.id == "article_152"
         assert entry.meta["Title"] == "Treatise on the viability of rocket cars"
         assert entry.meta["Blurb"] == "A rocket car is a car powered by a rocket engine."
+        assert "_tensor_facets" not in entry.meta
         assert entry.vector == [-0.10393160581588745,
                                 0.0465407557785511,
                                 -0.01760256476700306]  # The vector values should match the "_embedding" values of title in mock response
@@ -214,9 +482,84 @@ class TestMarqoVectorStorageDriver:
 
         # Assert
         assert len(entries) == 1
-        mock_marqo.index().search.assert_called_once_with("", limit=10000, filter_string=None)
+        mock_marqo.index().search.assert_called_once_with(
+            "", limit=500, offset=0, filter_string=None, attributes_to_retrieve=("_id",)
+        )
         mock_marqo.index().get_documents.assert_called_once_with(document_ids=["5aed93eb-3878-4f12-bc92-0fda01c7d23d"], expose_facets=True)
         assert entries[0].id == "5aed93eb-3878-4f12-bc92-0fda01c7d23d"
         assert entries[0].vector == [0.1, 0.2, 0.3]
         assert entries[0].meta["Title"] == "Test Title"
-        assert entries[0].meta["Description"] == "Test description"
\ No newline at end of file
+        assert entries[0].meta["Description"] == "Test description"
+
+    def test_upsert_texts(self, driver, mock_marqo):
+        mock_marqo.index().add_documents.side_effect = lambda docs, **kwargs: {
+            "errors": False,
+            "items": [{"_id": f"id-{d['Description']}", "result": "created", "status": 201} for d in docs]
+        }
+        driver.batch_size = 2
+
+        result = driver.upsert_texts(["foo", "bar", "baz"], namespace="test")
+
+        assert mock_marqo.index().add_documents.call_count == 2
+        assert result == ["id-foo", "id-bar", "id-baz"]
+
+    def test_upsert_text_artifacts(self, driver, mock_marqo):
+        mock_marqo.index().add_documents.side_effect = lambda docs, **kwargs: {
+            "errors": False,
+            "items": [{"_id": d["_id"], "result": "created", "status": 201} for d in docs]
+        }
+
+        driver.batch_size = 2
+
+        driver.upsert_text_artifacts({
+            "foo": [TextArtifact("foo 1"), TextArtifact("foo 2")],
+            "bar": [TextArtifact("bar 1")]
+        })
+
+        assert mock_marqo.index().add_documents.call_count == 2
+
+        docs = [d for c in mock_marqo.index().add_documents.call_args_list for d in c.args[0]]
+
+        assert sorted((d["namespace"], d["Description"]) for d in docs) == [
+            ("bar", "bar 1"), ("foo", "foo 1"), ("foo", "foo 2")
+        ]
+
+    def test_iter_entries_pages(self, driver, mock_marqo):
+        mock_marqo.index().search.side_effect = [
+            {"hits": [{"_id": "foo"}, {"_id": "bar"}]},
+            {"hits": [{"_id": "baz"}]}
+        ]
+        mock_marqo.index().get_documents.side_effect = lambda document_ids, **kwargs: {
+            "results": [
+                {"_found": True, "_id": i, "_tensor_facets": [{"_embedding": [0.1]}], "namespace": "test"}
+                for i in document_ids
+            ]
+        }
+
+        entries = list(driver.iter_entries(namespace="test", page_size=2))
+
+        assert [e.id for e in entries] == ["foo", "bar", "baz"]
+        assert all(e.namespace == "test" for e in entries)
+        assert mock_marqo.index().search.call_args_list[1].kwargs["offset"] == 2
+        assert mock_marqo.index().get_documents.call_count == 2
+
+    def test_iter_entries_stops_at_max_retrievable_docs(self, driver, mock_marqo, caplog):
+        mock_marqo.index().search.side_effect = [
+            {"hits": [{"_id": "foo"}, {"_id": "bar"}]},
+            {"hits": [{"_id": "bar"}]}
+        ]
+        mock_marqo.index().get_documents.side_effect = lambda document_ids, **kwargs: {
+            "results": [
+                {"_found": True, "_id": i, "_tensor_facets": [{"_embedding": [0.1]}]} for i in document_ids
+            ]
+        }
+        driver.max_retrievable_docs = 3
+
+        entries = list(driver.iter_entries(page_size=2))
+
+        assert [e.id for e in entries] == ["foo", "bar"]
+        assert mock_marqo.index().search.call_args_list[1].kwargs["limit"] == 1
+        assert mock_marqo.index().search.call_args_list[1].kwargs["offset"] == 2
+        assert mock_marqo.index().search.call_count == 2
+        assert mock_marqo.index().get_documents.call_count == 1
+        assert "maximum number of retrievable documents" in caplog.text
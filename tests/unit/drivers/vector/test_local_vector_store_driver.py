@@ -34,6 +34,19 @@ class TestLocalVectorStoreDriver:
         assert BaseArtifact.from_json(foo_entries[0].meta["artifact"]).value == "foo"
         assert BaseArtifact.from_json(bar_entries[0].meta["artifact"]).value == "bar"
 
+    def test_upsert_multiple_same_namespace(self, driver):
+        driver.upsert_text_artifacts({
+            "foo": [TextArtifact("foo 1"), TextArtifact("foo 2"), TextArtifact("foo 3")]
+        }, meta={"bar": "baz"})
+
+        entries = driver.load_entries("foo")
+
+        assert len(entries) == 3
+        assert sorted(BaseArtifact.from_json(e.meta["artifact"]).value for e in entries) == [
+            "foo 1", "foo 2", "foo 3"
+        ]
+        assert all(e.meta["bar"] == "baz" for e in entries)
+
     def test_query(self, driver):
         driver.upsert_text_artifact(
             TextArtifact("foobar"),
@@ -10,3 +10,38 @@ class TestCohereTokenizer:
 
     def test_init(self, tokenizer):
         assert tokenizer
+
+    def test_encode_is_cached(self, mocker):
+        client = mocker.Mock()
+        client.tokenize.return_value.tokens = [1, 2, 3]
+        tokenizer = CohereTokenizer(client=client)
+
+        assert tokenizer.encode("foo bar") == [1, 2, 3]
+        assert tokenizer.encode("foo bar") == [1, 2, 3]
+        client.tokenize.assert_called_once_with(text="foo bar")
+
+    def test_decode_is_cached(self, mocker):
+        client = mocker.Mock()
+        client.detokenize.return_value.text = "foo bar"
+        tokenizer = CohereTokenizer(client=client)
+
+        assert tokenizer.decode([1, 2, 3]) == "foo bar"
+        assert tokenizer.decode([1, 2, 3]) == "foo bar"
+        client.detokenize.assert_called_once_with(tokens=[1, 2, 3])
+
+    def test_cache_is_per_instance_and_bounded(self, mocker):
+        client = mocker.Mock()
+        client.tokenize.side_effect = lambda text: mocker.Mock(tokens=[len(text)])
+        tokenizer = CohereTokenizer(client=client)
+        mocker.patch.object(CohereTokenizer, "CACHE_SIZE", 2)
+
+        tokenizer.encode("a")
+        tokenizer.encode("bb")
+        tokenizer.encode("ccc")
+        tokenizer.encode("a")
+
+        assert client.tokenize.call_count == 4
+
+        CohereTokenizer(client=client).encode("ccc")
+
+        assert client.tokenize.call_count == 5
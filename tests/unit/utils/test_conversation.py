@@ -1,3 +1,4 @@
+import pytest
 from tests.mocks.mock_prompt_driver import MockPromptDriver
 from griptape.memory.structure import ConversationMemory
 from griptape.tasks import PromptTask
@@ -6,30 +7,30 @@ from griptape.utils import Conversation
 
 
 class TestConversation:
-    def test_lines(self):
+    @pytest.fixture
+    def pipeline(self):
         pipeline = Pipeline(prompt_driver=MockPromptDriver(), memory=ConversationMemory())
 
         pipeline.add_tasks(
             PromptTask("question 1")
         )
 
-        pipeline.run()
-        pipeline.run()
+        return pipeline
 
-        lines = Conversation(pipeline.memory).lines()
+    def test_lines(self, pipeline):
+        for _ in range(2):
+            pipeline.run()
 
-        assert lines[0] == "Q: question 1"
-        assert lines[1] == "A: mock output"
-        assert lines[2] == "Q: question 1"
-        assert lines[3] == "A: mock output"
-
-    def test___str__(self):
-        pipeline = Pipeline(prompt_driver=MockPromptDriver(), memory=ConversationMemory())
+        lines = Conversation(pipeline.memory).lines()
 
-        pipeline.add_tasks(
-            PromptTask("question 1")
-        )
+        assert lines == [
+            "Q: question 1",
+            "A: mock output",
+            "Q: question 1",
+            "A: mock output"
+        ]
 
+    def test___str__(self, pipeline):
         pipeline.run()
 
         string = str(Conversation(pipeline.memory))